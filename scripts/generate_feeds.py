@@ -2,30 +2,80 @@
 from __future__ import annotations
 
 import argparse
+import gzip
 import json
 import logging
 import re
 import sys
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from email.utils import format_datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Any
-from urllib.parse import urljoin, urlparse
+from typing import Any, BinaryIO
+from urllib.parse import ParseResult, urljoin, urlparse
 from urllib.request import Request, urlopen
+from xml.sax.saxutils import escape
 
 try:
-    from bs4 import BeautifulSoup
+    import lxml.html
+    from lxml import etree
 except ModuleNotFoundError as exc:
-    raise SystemExit("Missing dependency: beautifulsoup4. Run: pip install -r requirements.txt") from exc
+    raise SystemExit("Missing dependency: lxml. Run: pip install -r requirements.txt") from exc
+
+try:
+    from lxml.cssselect import CSSSelector, SelectorError
+except ImportError as exc:
+    raise SystemExit("Missing dependency: cssselect. Run: pip install -r requirements.txt") from exc
 
 try:
     from dateutil import parser as date_parser
 except ModuleNotFoundError as exc:
     raise SystemExit("Missing dependency: python-dateutil. Run: pip install -r requirements.txt") from exc
 
-ARTICLE_TYPES = {"Article", "BlogPosting", "NewsArticle", "TechArticle"}
+try:
+    import ciso8601
+except ModuleNotFoundError:
+    ciso8601 = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser, LexborNode
+except ModuleNotFoundError:
+    LexborHTMLParser = None
+    LexborNode = None
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+except ModuleNotFoundError:
+    requests = None
+
+try:
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch either.
+    from orjson import loads as json_ld_loads
+except ModuleNotFoundError:
+    json_ld_loads = json.loads
+
+ARTICLE_TYPES = frozenset({"Article", "BlogPosting", "NewsArticle", "TechArticle"})
+TRUE_STRINGS = frozenset({"1", "true", "yes", "y", "on"})
+FALSE_STRINGS = frozenset({"0", "false", "no", "n", "off"})
+ZERO_OFFSET = timedelta(0)
+WHITESPACE_RE = re.compile(r"\s+")
+SLUG_SEPARATOR_RE = re.compile(r"[-_]+")
+DEFAULT_REGEX_FLAGS = re.compile("").flags
+# Numbered backreferences and numbered conditionals, which renumber inside an alternation.
+NUMBERED_GROUP_REF_RE = re.compile(r"\\\d|\(\?\(\d")
+# Same strings BeautifulSoup's get_text() visits: no script/style/template bodies, no comments.
+TEXT_NODES = etree.XPath(".//text()[not(ancestor::script or ancestor::style or ancestor::template)]")
+LEXBOR_STRIPPED_TAGS = ["script", "style"]
+ANCHOR_NODES = etree.XPath(".//a[@href]")
+# HTML attribute values for type are case-insensitive (lexbor and the old soupsieve selector agree).
+JSON_LD_SCRIPTS = etree.XPath(
+    "//script[translate(@type, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')"
+    " = 'application/ld+json']"
+)
 
 
 @dataclass
@@ -40,6 +90,7 @@ class FeedItem:
 class FeedSource:
     source_id: str
     url: str
+    normalized_url: str
     site_url: str
     feed_title: str
     feed_description: str
@@ -47,10 +98,15 @@ class FeedSource:
     max_items: int
     include_url_patterns: list[str]
     exclude_url_patterns: list[str]
+    include_regexes: tuple[re.Pattern[str], ...]
+    exclude_regexes: tuple[re.Pattern[str], ...]
     link_scope_selectors: list[str]
+    link_scope_matchers: list[CSSSelector]
     use_json_ld: bool
     user_agent: str
     timeout_seconds: int
+    max_bytes: int
+    config_error: str | None = None
 
 
 def parse_args() -> argparse.Namespace:
@@ -59,6 +115,19 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--source-id", help="Only process a single source_id")
     parser.add_argument("--html-file", help="Use local HTML file for parsing (debug/testing)")
     parser.add_argument("--dry-run", action="store_true", help="Parse and print results without writing XML")
+    parser.add_argument(
+        "--xml-writer",
+        choices=["string", "etree"],
+        default="string",
+        help="RSS serializer: direct string writer (default) or ElementTree",
+    )
+    parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="Parse HTML with selectolax (lexbor) when it is installed",
+    )
+    parser.add_argument("--pretty", action="store_true", help="Indent the generated RSS XML")
+    parser.add_argument("--jobs", type=int, default=8, help="Number of sources to process concurrently")
     parser.add_argument("--verbose", action="store_true", help="Enable verbose logging")
     return parser.parse_args()
 
@@ -79,13 +148,56 @@ def parse_bool(value: Any, default: bool) -> bool:
         return bool(value)
     if isinstance(value, str):
         normalized = value.strip().lower()
-        if normalized in {"1", "true", "yes", "y", "on"}:
+        if normalized in TRUE_STRINGS:
             return True
-        if normalized in {"0", "false", "no", "n", "off"}:
+        if normalized in FALSE_STRINGS:
             return False
     return default
 
 
+@lru_cache(maxsize=4096)
+def parse_url(url: str) -> ParseResult:
+    return urlparse(url)
+
+
+def compile_patterns(patterns: list[str], source_id: str) -> tuple[re.Pattern[str], ...]:
+    compiled: list[re.Pattern[str]] = []
+    for pattern in patterns:
+        try:
+            compiled.append(re.compile(pattern))
+        except re.error as exc:
+            raise ValueError(f"Invalid URL pattern source={source_id} pattern={pattern!r}: {exc}") from exc
+    if len(compiled) < 2:
+        return tuple(compiled)
+
+    # One alternation replaces a Python-level loop, but only when it means exactly the same
+    # thing: inline global flags, numbered group references and repeated group names change
+    # meaning or fail to compile once patterns are joined.
+    group_names = [name for regex in compiled for name in regex.groupindex]
+    if (
+        any(regex.flags != DEFAULT_REGEX_FLAGS for regex in compiled)
+        or any(NUMBERED_GROUP_REF_RE.search(pattern) for pattern in patterns)
+        or len(group_names) != len(set(group_names))
+    ):
+        return tuple(compiled)
+    try:
+        return (re.compile("|".join(f"(?:{pattern})" for pattern in patterns)),)
+    except re.error:
+        return tuple(compiled)
+
+
+def compile_selectors(selectors: list[str], source_id: str) -> list[CSSSelector]:
+    compiled: list[CSSSelector] = []
+    for selector in selectors:
+        try:
+            compiled.append(CSSSelector(selector, translator="html"))
+        except SelectorError as exc:
+            raise ValueError(
+                f"Invalid link scope selector source={source_id} selector={selector!r}: {exc}"
+            ) from exc
+    return compiled
+
+
 def load_sources(config_path: Path) -> list[FeedSource]:
     raw = json.loads(config_path.read_text(encoding="utf-8"))
     if isinstance(raw, dict):
@@ -98,47 +210,142 @@ def load_sources(config_path: Path) -> list[FeedSource]:
     sources: list[FeedSource] = []
     for row in source_rows:
         source_url = row["url"].strip()
-        site_url = row.get("site_url") or f"{urlparse(source_url).scheme}://{urlparse(source_url).netloc}"
+        parsed_url = parse_url(source_url)
+        site_url = row.get("site_url") or f"{parsed_url.scheme}://{parsed_url.netloc}"
         source_id = row["id"].strip()
+        include_url_patterns = list(row.get("include_url_patterns", []))
+        exclude_url_patterns = list(row.get("exclude_url_patterns", []))
+        link_scope_selectors = list(row.get("link_scope_selectors", []))
+        # A bad pattern or selector fails only its own source (in process_source),
+        # not the whole config.
+        config_error = None
+        try:
+            include_regexes = compile_patterns(include_url_patterns, source_id)
+            exclude_regexes = compile_patterns(exclude_url_patterns, source_id)
+            link_scope_matchers = compile_selectors(link_scope_selectors, source_id)
+        except ValueError as exc:
+            include_regexes = exclude_regexes = ()
+            link_scope_matchers = []
+            config_error = str(exc)
         sources.append(
             FeedSource(
                 source_id=source_id,
                 url=source_url,
+                normalized_url=canonical_url(source_url),
                 site_url=site_url,
                 feed_title=row.get("feed_title") or source_id,
                 feed_description=row.get("feed_description") or f"Generated feed for {source_url}",
                 output_rss=Path(row.get("output_rss") or f"feeds/{source_id}.rss.xml"),
                 max_items=int(row.get("max_items", 30)),
-                include_url_patterns=list(row.get("include_url_patterns", [])),
-                exclude_url_patterns=list(row.get("exclude_url_patterns", [])),
-                link_scope_selectors=list(row.get("link_scope_selectors", [])),
+                include_url_patterns=include_url_patterns,
+                exclude_url_patterns=exclude_url_patterns,
+                include_regexes=include_regexes,
+                exclude_regexes=exclude_regexes,
+                link_scope_selectors=link_scope_selectors,
+                link_scope_matchers=link_scope_matchers,
                 use_json_ld=parse_bool(row.get("use_json_ld"), default=True),
                 user_agent=row.get("user_agent") or "Mozilla/5.0 (compatible; blog-rss-feed/1.0)",
                 timeout_seconds=int(row.get("timeout_seconds", 20)),
+                max_bytes=int(row.get("max_bytes", 4_000_000)),
+                config_error=config_error,
             )
         )
     return sources
 
 
-def fetch_html(url: str, *, user_agent: str, timeout_seconds: int) -> str:
-    request = Request(url, headers={"User-Agent": user_agent})
+def build_http_session() -> requests.Session | None:
+    if requests is None:
+        return None
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+HTTP_SESSION = build_http_session()
+
+
+def response_charset(content_type: str) -> str:
+    if "charset=" in content_type:
+        return content_type.split("charset=")[-1].split(";")[0].strip()
+    return "utf-8"
+
+
+def cap_body(raw: bytes, url: str, max_bytes: int) -> bytes:
+    if len(raw) <= max_bytes:
+        return raw
+    logging.warning("Response truncated url=%s max_bytes=%d", url, max_bytes)
+    return raw[:max_bytes]
+
+
+def fetch_html(url: str, *, user_agent: str, timeout_seconds: int, max_bytes: int) -> str:
+    if HTTP_SESSION is not None:
+        with HTTP_SESSION.get(
+            url,
+            headers={"User-Agent": user_agent},
+            timeout=timeout_seconds,
+            stream=True,
+        ) as response:
+            response.raise_for_status()
+            # iter_content undoes gzip/deflate, so max_bytes caps the decoded body.
+            chunks: list[bytes] = []
+            size = 0
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size > max_bytes:
+                    break
+            raw = cap_body(b"".join(chunks), url, max_bytes)
+            return raw.decode(response_charset(response.headers.get("Content-Type", "")), errors="replace")
+
+    request = Request(url, headers={"User-Agent": user_agent, "Accept-Encoding": "gzip"})
     with urlopen(request, timeout=timeout_seconds) as response:
-        content_type = response.headers.get("Content-Type", "")
-        charset = "utf-8"
-        if "charset=" in content_type:
-            charset = content_type.split("charset=")[-1].split(";")[0].strip()
-        raw = response.read()
-        return raw.decode(charset, errors="replace")
+        charset = response_charset(response.headers.get("Content-Type", ""))
+        if response.headers.get("Content-Encoding", "").lower() == "gzip":
+            with gzip.GzipFile(fileobj=response) as body:
+                raw = body.read(max_bytes + 1)
+        else:
+            raw = response.read(max_bytes + 1)
+        return cap_body(raw, url, max_bytes).decode(charset, errors="replace")
 
 
 def normalize_datetime(value: datetime | None) -> datetime | None:
     if value is None:
         return None
     if value.tzinfo is None:
-        value = value.replace(tzinfo=timezone.utc)
+        return value.replace(tzinfo=timezone.utc)
+    if value.utcoffset() == ZERO_OFFSET:
+        return value
     return value.astimezone(timezone.utc)
 
 
+def parse_iso_datetime(value: str) -> datetime | None:
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        pass
+    if ciso8601 is not None:
+        try:
+            return ciso8601.parse_datetime(value)
+        except ValueError:
+            pass
+    return None
+
+
+@lru_cache(maxsize=2048)
+def parse_date_string(value: str) -> datetime | None:
+    # Listing pages repeat the same date strings; datetimes are immutable, so sharing is safe.
+    parsed = parse_iso_datetime(value)
+    if parsed is not None:
+        return normalize_datetime(parsed)
+    try:
+        parsed = date_parser.parse(value)
+        return normalize_datetime(parsed)
+    except Exception:
+        return None
+
+
 def parse_date(value: Any) -> datetime | None:
     if not value:
         return None
@@ -148,11 +355,7 @@ def parse_date(value: Any) -> datetime | None:
         value = value.strip()
         if not value:
             return None
-        try:
-            parsed = date_parser.parse(value)
-            return normalize_datetime(parsed)
-        except Exception:
-            return None
+        return parse_date_string(value)
     return None
 
 
@@ -163,7 +366,7 @@ def normalize_link(href: str, base_url: str) -> str | None:
     if href.startswith("#") or href.startswith("mailto:") or href.startswith("javascript:"):
         return None
     full_url = urljoin(base_url, href)
-    parsed = urlparse(full_url)
+    parsed = parse_url(full_url)
     if parsed.scheme not in {"http", "https"}:
         return None
     if not parsed.netloc:
@@ -171,43 +374,95 @@ def normalize_link(href: str, base_url: str) -> str | None:
     return full_url
 
 
-def same_url(a: str, b: str) -> bool:
-    def norm(u: str) -> str:
-        parsed = urlparse(u)
-        path = parsed.path.rstrip("/") or "/"
-        return f"{parsed.scheme}://{parsed.netloc}{path}"
-
-    return norm(a) == norm(b)
+def canonical_url(url: str) -> str:
+    parsed = parse_url(url)
+    path = parsed.path.rstrip("/") or "/"
+    return f"{parsed.scheme}://{parsed.netloc}{path}"
 
 
-def matches_patterns(url: str, include_patterns: list[str], exclude_patterns: list[str]) -> bool:
-    if include_patterns and not any(re.search(pattern, url) for pattern in include_patterns):
+def matches_patterns(
+    url: str,
+    include_patterns: tuple[re.Pattern[str], ...],
+    exclude_patterns: tuple[re.Pattern[str], ...],
+) -> bool:
+    if include_patterns and not any(pattern.search(url) for pattern in include_patterns):
         return False
-    if exclude_patterns and any(re.search(pattern, url) for pattern in exclude_patterns):
+    if exclude_patterns and any(pattern.search(url) for pattern in exclude_patterns):
         return False
     return True
 
 
+@lru_cache(maxsize=4096)
 def slug_to_title(link: str) -> str:
-    slug = urlparse(link).path.rstrip("/").split("/")[-1]
-    slug = re.sub(r"[-_]+", " ", slug)
+    slug = parse_url(link).path.rstrip("/").split("/")[-1]
+    slug = SLUG_SEPARATOR_RE.sub(" ", slug)
     return slug.strip().title() or link
 
 
 def clean_text(value: str | None) -> str | None:
     if value is None:
         return None
-    cleaned = re.sub(r"\s+", " ", value).strip()
+    cleaned = WHITESPACE_RE.sub(" ", value).strip()
     return cleaned or None
 
 
 def should_keep_link(link: str, source: FeedSource) -> bool:
-    if same_url(link, source.url):
+    if canonical_url(link) == source.normalized_url:
         return False
-    return matches_patterns(link, source.include_url_patterns, source.exclude_url_patterns)
+    return matches_patterns(link, source.include_regexes, source.exclude_regexes)
 
 
-def extract_items_from_json_ld(soup: BeautifulSoup, source: FeedSource) -> list[FeedItem]:
+def parse_html(html: str) -> lxml.html.HtmlElement:
+    # huge_tree lifts libxml2's 256-level depth limit, past which it silently drops the rest
+    # of the document (e.g. cards that each leave a <div> unclosed). Parsers are not shared
+    # across threads, so build one per call.
+    parser = lxml.html.HTMLParser(huge_tree=True)
+    try:
+        return lxml.html.document_fromstring(html, parser=parser)
+    except ValueError:
+        # lxml rejects str input that carries an XML encoding declaration (XHTML pages).
+        return lxml.html.document_fromstring(html.encode("utf-8"), parser=parser)
+    except etree.ParserError:
+        return lxml.html.document_fromstring("<html></html>", parser=parser)
+
+
+def parse_html_fast(html: str) -> LexborHTMLParser:
+    return LexborHTMLParser(html)
+
+
+def is_lexbor(node: Any) -> bool:
+    return LexborNode is not None and isinstance(node, (LexborNode, LexborHTMLParser))
+
+
+def element_text(element: Any) -> str:
+    if is_lexbor(element):
+        return element.text(deep=True, separator=" ", strip=True)
+    parts = (part.strip() for part in TEXT_NODES(element))
+    return " ".join(part for part in parts if part)
+
+
+def element_attr(element: Any, name: str) -> str | None:
+    if is_lexbor(element):
+        return element.attributes.get(name)
+    return element.get(name)
+
+
+def element_parent(element: Any) -> Any | None:
+    if is_lexbor(element):
+        return element.parent
+    return element.getparent()
+
+
+def json_ld_texts(tree: lxml.html.HtmlElement | LexborHTMLParser) -> list[str]:
+    if is_lexbor(tree):
+        return [script.text() for script in tree.css("script[type='application/ld+json']")]
+    return [script.text or "" for script in JSON_LD_SCRIPTS(tree)]
+
+
+def extract_items_from_json_ld(
+    tree: lxml.html.HtmlElement | LexborHTMLParser,
+    source: FeedSource,
+) -> list[FeedItem]:
     items: list[FeedItem] = []
 
     def node_types(node: dict[str, Any]) -> set[str]:
@@ -235,36 +490,40 @@ def extract_items_from_json_ld(soup: BeautifulSoup, source: FeedSource) -> list[
                 return entity_id
         return None
 
-    def walk(node: Any) -> None:
-        if isinstance(node, list):
-            for child in node:
-                walk(child)
-            return
-        if not isinstance(node, dict):
-            return
-
-        types = node_types(node)
-        if types.intersection(ARTICLE_TYPES):
-            raw_link = node_url(node)
-            link = normalize_link(raw_link or "", source.url)
-            if link and should_keep_link(link, source):
-                title = clean_text(node.get("headline") or node.get("name")) or slug_to_title(link)
-                summary = clean_text(node.get("description"))
-                published = parse_date(
-                    node.get("datePublished") or node.get("dateCreated") or node.get("dateModified")
-                )
-                items.append(FeedItem(title=title, link=link, summary=summary, published=published))
-
-        for value in node.values():
-            walk(value)
-
-    for script in soup.select("script[type='application/ld+json']"):
-        raw_text = script.string or script.get_text() or ""
+    def walk(payload: Any) -> None:
+        # Explicit stack instead of recursion: deep @graph/hasPart nesting cannot hit the
+        # recursion limit. Children are pushed reversed to keep document (pre-)order.
+        article_types = ARTICLE_TYPES
+        append_item = items.append
+        stack = [payload]
+        pop = stack.pop
+        extend = stack.extend
+        while stack:
+            node = pop()
+            if isinstance(node, list):
+                extend(reversed(node))
+                continue
+            if not isinstance(node, dict):
+                continue
+
+            get = node.get
+            if node_types(node).intersection(article_types):
+                raw_link = node_url(node)
+                link = normalize_link(raw_link or "", source.url)
+                if link and should_keep_link(link, source):
+                    title = clean_text(get("headline") or get("name")) or slug_to_title(link)
+                    summary = clean_text(get("description"))
+                    published = parse_date(get("datePublished") or get("dateCreated") or get("dateModified"))
+                    append_item(FeedItem(title=title, link=link, summary=summary, published=published))
+
+            extend(reversed(node.values()))
+
+    for raw_text in json_ld_texts(tree):
         raw_text = raw_text.strip()
         if not raw_text:
             continue
         try:
-            payload = json.loads(raw_text)
+            payload = json_ld_loads(raw_text)
         except json.JSONDecodeError:
             continue
         walk(payload)
@@ -274,31 +533,35 @@ def extract_items_from_json_ld(soup: BeautifulSoup, source: FeedSource) -> list[
 
 def parse_nearby_date(anchor: Any) -> datetime | None:
     scope = [anchor]
-    parent = anchor.parent
-    steps = 0
-    while parent is not None and steps < 3:
+    parent = element_parent(anchor)
+    while parent is not None and len(scope) < 4:
         scope.append(parent)
-        parent = parent.parent
-        steps += 1
+        parent = element_parent(parent)
 
     for node in scope:
-        time_node = node.find("time") if hasattr(node, "find") else None
-        if time_node:
-            parsed = parse_date(time_node.get("datetime") or time_node.get_text(" ", strip=True))
+        time_node = node.css_first("time") if is_lexbor(node) else node.find(".//time")
+        if time_node is not None:
+            parsed = parse_date(element_attr(time_node, "datetime") or element_text(time_node))
             if parsed:
                 return parsed
 
     return None
 
 
-def select_link_anchors(soup: BeautifulSoup, source: FeedSource) -> list[Any]:
+def select_link_anchors(tree: lxml.html.HtmlElement | LexborHTMLParser, source: FeedSource) -> list[Any]:
+    fast = is_lexbor(tree)
     if not source.link_scope_selectors:
-        return list(soup.select("a[href]"))
+        return tree.css("a[href]") if fast else ANCHOR_NODES(tree)
 
     anchors: list[Any] = []
-    for selector in source.link_scope_selectors:
-        for container in soup.select(selector):
-            anchors.extend(container.select("a[href]"))
+    if fast:
+        for selector in source.link_scope_selectors:
+            for container in tree.css(selector):
+                anchors.extend(container.css("a[href]"))
+    else:
+        for matcher in source.link_scope_matchers:
+            for container in matcher(tree):
+                anchors.extend(ANCHOR_NODES(container))
 
     if not anchors:
         logging.warning(
@@ -309,45 +572,75 @@ def select_link_anchors(soup: BeautifulSoup, source: FeedSource) -> list[Any]:
     return anchors
 
 
-def extract_items_from_links(soup: BeautifulSoup, source: FeedSource) -> list[FeedItem]:
+def extract_items_from_links(
+    tree: lxml.html.HtmlElement | LexborHTMLParser,
+    source: FeedSource,
+) -> list[FeedItem]:
     items: list[FeedItem] = []
-
-    for anchor in select_link_anchors(soup, source):
-        link = normalize_link(anchor.get("href", ""), source.url)
-        if not link or not should_keep_link(link, source):
+    # Raw href -> accepted link (None when rejected), so repeated hrefs skip normalization.
+    links_by_href: dict[str, str | None] = {}
+    # Links whose first item already has a real title, summary and date. dedupe_and_rank
+    # would discard everything a later duplicate anchor contributes, so skip those anchors.
+    complete_links: set[str] = set()
+    # Cards often hold several anchors under one parent; compute each parent's text once.
+    # Keyed on the element itself rather than id(): lxml proxies can be freed and their
+    # ids reused, and lexbor nodes compare and hash by the underlying DOM node.
+    container_texts: dict[Any, str | None] = {}
+
+    for anchor in select_link_anchors(tree, source):
+        href = element_attr(anchor, "href") or ""
+        if href in links_by_href:
+            link = links_by_href[href]
+        else:
+            link = normalize_link(href, source.url)
+            if link and not should_keep_link(link, source):
+                link = None
+            links_by_href[href] = link
+        if not link or link in complete_links:
             continue
 
-        title = clean_text(anchor.get_text(" ", strip=True))
+        title = clean_text(element_text(anchor))
         if not title or len(title) < 8:
             title = slug_to_title(link)
 
         summary = None
-        container_text = clean_text(anchor.parent.get_text(" ", strip=True)) if anchor.parent else None
+        container = element_parent(anchor)
+        container_text = None
+        if container is not None:
+            if container in container_texts:
+                container_text = container_texts[container]
+            else:
+                container_text = container_texts[container] = clean_text(element_text(container))
         if container_text and container_text != title:
             summary = container_text
 
+        published = parse_nearby_date(anchor)
         items.append(
             FeedItem(
                 title=title,
                 link=link,
                 summary=summary,
-                published=parse_nearby_date(anchor),
+                published=published,
             )
         )
+        if summary and published and title != slug_to_title(link):
+            complete_links.add(link)
 
     return items
 
 
 def dedupe_and_rank(items: list[FeedItem], max_items: int) -> list[FeedItem]:
-    merged: dict[str, tuple[FeedItem, int]] = {}
+    positions: dict[str, int] = {}
+    merged: list[FeedItem] = []
 
-    for index, item in enumerate(items):
-        existing_pair = merged.get(item.link)
-        existing = existing_pair[0] if existing_pair else None
-        if existing is None:
-            merged[item.link] = (item, index)
+    for item in items:
+        position = positions.get(item.link)
+        if position is None:
+            positions[item.link] = len(merged)
+            merged.append(item)
             continue
 
+        existing = merged[position]
         if not existing.summary and item.summary:
             existing.summary = item.summary
         if not existing.published and item.published:
@@ -355,15 +648,13 @@ def dedupe_and_rank(items: list[FeedItem], max_items: int) -> list[FeedItem]:
         if existing.title == slug_to_title(existing.link) and item.title:
             existing.title = item.title
 
-    result = list(merged.values())
-    result.sort(
-        key=lambda pair: (
-            0 if pair[0].published else 1,
-            -(pair[0].published.timestamp() if pair[0].published else 0),
-            pair[1],
-        )
-    )
-    return [item for item, _ in result[:max_items]]
+    # Precomputed plain-tuple keys (dated first, newest first, then first-seen order).
+    keys = [
+        (0, -item.published.timestamp(), position) if item.published else (1, 0.0, position)
+        for position, item in enumerate(merged)
+    ]
+    order = sorted(range(len(merged)), key=keys.__getitem__)
+    return [merged[position] for position in order[:max_items]]
 
 
 def newest_timestamp(items: list[FeedItem]) -> datetime | None:
@@ -398,33 +689,109 @@ def build_rss_xml(source: FeedSource, items: list[FeedItem]) -> ET.Element:
     return rss
 
 
-def write_xml(root: ET.Element, output_path: Path) -> None:
+def open_feed_file(output_path: Path) -> BinaryIO:
     output_path.parent.mkdir(parents=True, exist_ok=True)
+    if output_path.suffix == ".gz":
+        # mtime=0 keeps the bytes stable across runs, so unchanged feeds don't show up as diffs.
+        return gzip.GzipFile(output_path, "wb", compresslevel=6, mtime=0)
+    return output_path.open("wb")
+
+
+def write_xml(root: ET.Element, output_path: Path, pretty: bool = False) -> None:
     tree = ET.ElementTree(root)
-    ET.indent(tree, space="  ")
-    tree.write(output_path, encoding="utf-8", xml_declaration=True)
+    if pretty:
+        ET.indent(tree, space="  ")
+    with open_feed_file(output_path) as handle:
+        tree.write(handle, encoding="utf-8", xml_declaration=True)
+
+
+def render_rss(source: FeedSource, items: list[FeedItem], pretty: bool = False) -> str:
+    # Byte-for-byte the same document build_rss_xml + write_xml produce, without the tree.
+    newline = "\n" if pretty else ""
+    pad = "  " if pretty else ""
+
+    def element(tag: str, text: str, depth: int, attributes: str = "") -> str:
+        indent = pad * depth
+        if not text:
+            return f"{indent}<{tag}{attributes} />{newline}"
+        return f"{indent}<{tag}{attributes}>{escape(text)}</{tag}>{newline}"
+
+    parts = [
+        "<?xml version='1.0' encoding='utf-8'?>\n",
+        f'<rss version="2.0">{newline}',
+        f"{pad}<channel>{newline}",
+        element("title", source.feed_title, 2),
+        element("link", source.site_url, 2),
+        element("description", source.feed_description, 2),
+    ]
+
+    latest = newest_timestamp(items)
+    if latest:
+        parts.append(element("lastBuildDate", format_datetime(latest), 2))
+
+    item_open = f"{pad * 2}<item>{newline}"
+    item_close = f"{pad * 2}</item>{newline}"
+    for item in items:
+        parts.append(item_open)
+        parts.append(element("title", item.title, 3))
+        parts.append(element("link", item.link, 3))
+        parts.append(element("guid", item.link, 3, ' isPermaLink="true"'))
+        if item.summary:
+            parts.append(element("description", item.summary, 3))
+        if item.published:
+            parts.append(element("pubDate", format_datetime(item.published), 3))
+        parts.append(item_close)
 
+    parts.append(f"{pad}</channel>{newline}</rss>")
+    return "".join(parts)
 
-def process_source(source: FeedSource, html_override: Path | None, dry_run: bool) -> None:
+
+def write_rss(source: FeedSource, items: list[FeedItem], output_path: Path, pretty: bool = False) -> None:
+    with open_feed_file(output_path) as handle:
+        handle.write(render_rss(source, items, pretty).encode("utf-8"))
+
+
+def process_source(
+    source: FeedSource,
+    html_override: Path | None,
+    dry_run: bool,
+    xml_writer: str = "string",
+    fast: bool = False,
+    pretty: bool = False,
+) -> None:
     logging.info("Processing source=%s url=%s", source.source_id, source.url)
+    if source.config_error:
+        raise ValueError(source.config_error)
 
     if html_override:
         html = html_override.read_text(encoding="utf-8")
     else:
-        html = fetch_html(source.url, user_agent=source.user_agent, timeout_seconds=source.timeout_seconds)
+        html = fetch_html(
+            source.url,
+            user_agent=source.user_agent,
+            timeout_seconds=source.timeout_seconds,
+            max_bytes=source.max_bytes,
+        )
 
-    soup = BeautifulSoup(html, "html.parser")
+    tree = parse_html_fast(html) if fast else parse_html(html)
+    if fast and tree.css_first("template") is not None:
+        # lexbor keeps <template> contents in a separate fragment that css() never reaches,
+        # so anchors inside templates would be lost; use lxml for such pages.
+        logging.debug("Page has <template> elements, parsing with lxml source=%s", source.source_id)
+        tree = parse_html(html)
     extracted: list[FeedItem] = []
     if source.use_json_ld:
-        extracted.extend(extract_items_from_json_ld(soup, source))
-    extracted.extend(extract_items_from_links(soup, source))
+        extracted.extend(extract_items_from_json_ld(tree, source))
+    if is_lexbor(tree):
+        # lexbor's text() includes script/style bodies; drop them so titles and summaries
+        # come out the same as on the lxml path.
+        tree.strip_tags(LEXBOR_STRIPPED_TAGS)
+    extracted.extend(extract_items_from_links(tree, source))
     items = dedupe_and_rank(extracted, source.max_items)
 
     if not items:
         logging.warning("No items extracted for source=%s", source.source_id)
 
-    rss_root = build_rss_xml(source, items)
-
     if dry_run:
         logging.info(
             "Dry run source=%s items=%d rss=%s",
@@ -434,7 +801,10 @@ def process_source(source: FeedSource, html_override: Path | None, dry_run: bool
         )
         return
 
-    write_xml(rss_root, source.output_rss)
+    if xml_writer == "etree":
+        write_xml(build_rss_xml(source, items), source.output_rss, pretty)
+    else:
+        write_rss(source, items, source.output_rss, pretty)
     logging.info(
         "Wrote source=%s items=%d rss=%s",
         source.source_id,
@@ -473,13 +843,35 @@ def main() -> int:
         logging.error("--html-file can only be used when processing one source")
         return 1
 
+    fast = args.fast
+    if fast and LexborHTMLParser is None:
+        logging.warning("--fast needs selectolax (pip install selectolax); using lxml")
+        fast = False
+
     errors = 0
-    for source in sources:
-        try:
-            process_source(source, html_override, args.dry_run)
-        except Exception as exc:
-            errors += 1
-            logging.exception("Source failed source=%s error=%s", source.source_id, exc)
+    jobs = min(args.jobs, len(sources))
+    if html_override or jobs <= 1:
+        for source in sources:
+            try:
+                process_source(source, html_override, args.dry_run, args.xml_writer, fast, args.pretty)
+            except Exception as exc:
+                errors += 1
+                logging.exception("Source failed source=%s error=%s", source.source_id, exc)
+    else:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = {
+                executor.submit(
+                    process_source, source, None, args.dry_run, args.xml_writer, fast, args.pretty
+                ): source
+                for source in sources
+            }
+            for future in as_completed(futures):
+                source = futures[future]
+                try:
+                    future.result()
+                except Exception as exc:
+                    errors += 1
+                    logging.exception("Source failed source=%s error=%s", source.source_id, exc)
 
     return 1 if errors else 0
 